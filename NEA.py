@@ -16,6 +16,7 @@ import uuid
 import smtplib
 from email.mime.text import MIMEText
 from datetime import datetime
+from scorecard import parse_batting_stats, parse_bowling_stats, ScorecardError
 
 # Ensure the Kivy version is at least 2.0.0
 kivy.require('2.0.0')
@@ -505,8 +506,8 @@ class DashboardScreen(Screen):
         self.venue = TextInput(hint_text='Venue', multiline=False)
         self.winning_team = TextInput(hint_text='Winning Team', multiline=False)
         self.team_scores = TextInput(hint_text='Team Scores', multiline=False)
-        self.batting_stats = TextInput(hint_text='Batting Stats (JSON)', multiline=False)
-        self.bowling_stats = TextInput(hint_text='Bowling Stats (JSON)', multiline=False)
+        self.batting_stats = TextInput(hint_text='Batting Stats (JSON or "user_id runs[*] balls 4s 6s; ...")', multiline=False)
+        self.bowling_stats = TextInput(hint_text='Bowling Stats (JSON or "user_id overs maidens runs wickets; ...")', multiline=False)
         add_result_button = Button(text='Add Match Result')
         add_result_button.bind(on_press=self.add_match_result)
         layout.add_widget(self.season_id)
@@ -533,8 +534,20 @@ class DashboardScreen(Screen):
         venue = self.venue.text
         winning_team = self.winning_team.text
         team_scores = self.team_scores.text
-        batting_stats = eval(self.batting_stats.text)
-        bowling_stats = eval(self.bowling_stats.text)
+        # Parse and validate both scorecards so every problem is shown at once
+        errors = []
+        try:
+            batting_stats = parse_batting_stats(self.batting_stats.text)
+        except ScorecardError as e:
+            errors.extend(e.errors)
+        try:
+            bowling_stats = parse_bowling_stats(self.bowling_stats.text)
+        except ScorecardError as e:
+            errors.extend(e.errors)
+        if errors:
+            popup = Popup(title='Invalid Scorecard', content=Label(text='\n'.join(errors)), size_hint=(None, None), size=(600, 400))
+            popup.open()
+            return
         add_match_result(season_id, date, opponent, venue, winning_team, team_scores, batting_stats, bowling_stats)
         popup = Popup(title='Success', content=Label(text='Match result added successfully'), size_hint=(None, None), size=(400, 200))
         popup.open()
@@ -0,0 +1,396 @@
+#Cricket Performance Tracker - scorecard parsing and validation
+#Parses the batting and bowling stats typed on the dashboard (or read in bulk)
+#and checks them before they reach the database
+import json
+import math
+import re
+import time
+
+# Tolerance allowed when a typed strike rate or economy rate is checked
+# against the value worked out from runs/balls or runs/overs.
+# The typed rate may be off by RATE_TOLERANCE plus RATE_RELATIVE_TOLERANCE
+# times the real rate, so a strike rate of 200 accepts anything from 198.95
+# to 201.05 (enough for values typed to the nearest whole number)
+RATE_TOLERANCE = 0.05
+RATE_RELATIVE_TOLERANCE = 0.005
+
+# Largest value SQLite can store in an INTEGER column
+SQLITE_INT_MAX = 2 ** 63 - 1
+
+# Field specs: (name, type, minimum, maximum, required)
+# A maximum of None means there is no upper limit
+BATTING_FIELDS = (
+    ('user_id', int, 1, SQLITE_INT_MAX, True),
+    ('runs', int, 0, 1000, True),
+    ('balls', int, 0, 1000, True),
+    ('fours', int, 0, 250, True),
+    ('sixes', int, 0, 250, True),
+    ('not_out', bool, 0, 1, False),
+    ('strike_rate', float, 0.0, 1000.0, False),
+)
+
+BOWLING_FIELDS = (
+    ('user_id', int, 1, SQLITE_INT_MAX, True),
+    ('overs', float, 0.0, 50.0, True),
+    ('maidens', int, 0, 50, True),
+    ('runs_conceded', int, 0, 500, True),
+    ('wickets', int, 0, 10, True),
+    ('economy_rate', float, 0.0, None, False),
+)
+
+# Compact line formats, one entry per player separated by ';'
+#   Batting: <user_id> <runs>[*] <balls> <fours> <sixes> [strike_rate]
+#            e.g. "1 45* 30 4 2; 2 12 15 1 0 80"   (* means not out)
+#   Bowling: <user_id> <overs> <maidens> <runs> <wickets> [economy_rate]
+#            e.g. "1 4 0 28 2; 2 3.4 1 19 1 5.18"  (3.4 means 3 overs 4 balls)
+_BATTING_TOKENS = ('user_id', 'runs', 'balls', 'fours', 'sixes', 'strike_rate')
+_BOWLING_TOKENS = ('user_id', 'maidens', 'runs_conceded', 'wickets', 'economy_rate')
+_FLOAT_TOKEN = re.compile(r'[-+]?\d+\.\d*$').match
+
+_NUMBER_TYPES = (int, float)
+_FLAG_TYPES = (int, bool)
+
+# Placeholder for line entries that could not be read (already reported)
+_UNREADABLE = object()
+
+
+# Exception raised when a scorecard has one or more problems
+# errors holds every problem found so they can all be shown at once
+class ScorecardError(ValueError):
+    def __init__(self, errors):
+        super(ScorecardError, self).__init__('\n'.join(errors))
+        self.errors = errors
+
+
+# Function to check one row field by field, recording every problem
+# This is the slow path, only used once the fast check has failed
+def _explain(specs, cross_check, row, kind, index, errors):
+    label = '%s[%d]' % (kind, index)
+    if type(row) is not dict:
+        errors.append('%s: expected an object with fields %s' % (label, ', '.join(spec[0] for spec in specs)))
+        return None
+    error_count = len(errors)
+    clean = {}
+    for name, field_type, low, high, required in specs:
+        value = row.get(name)
+        if value is None:
+            if required:
+                errors.append('%s.%s: missing' % (label, name))
+            else:
+                clean[name] = None
+            continue
+        value_type = type(value)
+        if field_type is int:
+            if value_type is float and value.is_integer():
+                value = int(value)
+            elif value_type is not int:
+                errors.append('%s.%s: expected a whole number, got %r' % (label, name, value))
+                continue
+        elif field_type is float:
+            if value_type not in _NUMBER_TYPES:
+                errors.append('%s.%s: expected a number, got %r' % (label, name, value))
+                continue
+            value = float(value)
+            if not math.isfinite(value):
+                errors.append('%s.%s: expected a finite number, got %r' % (label, name, value))
+                continue
+        elif value_type not in _FLAG_TYPES or value not in (0, 1):
+            errors.append('%s.%s: expected true/false or 0/1, got %r' % (label, name, value))
+            continue
+        if value < low or (high is not None and value > high):
+            if high is None:
+                errors.append('%s.%s: %r is below the minimum of %r' % (label, name, value, low))
+            else:
+                errors.append('%s.%s: %r is outside the range %r-%r' % (label, name, value, low, high))
+            continue
+        clean[name] = value
+    names = [spec[0] for spec in specs]
+    for name in row:
+        if name not in names:
+            errors.append('%s.%s: unknown field' % (label, name))
+    if len(errors) != error_count:
+        return None
+    return cross_check(clean, kind, index, errors)
+
+
+# Function to compile a set of field specs into a validator
+# The specs are turned into one straight-line Python function, so a valid
+# row costs a handful of lookups and comparisons and a single dict; any row
+# that fails is handed to _explain to collect the individual errors.
+# The validator is called as validator(row, kind, index, errors) and returns
+# the cleaned row, or None after appending to errors
+def compile_validator(fields, cross_check):
+    specs = tuple(fields)
+    checks = []
+    values = []
+    optional = []
+    for i, (name, field_type, low, high, required) in enumerate(specs):
+        value = 'v%d' % i
+        if field_type is int:
+            check = 'type(%s) is int and %r <= %s' % (value, low, value)
+            values.append('%r: %s' % (name, value))
+        elif field_type is float:
+            check = 'type(%s) in _NUMBER_TYPES and %r <= %s' % (value, low, value)
+            values.append('%r: float(%s)' % (name, value) if required else
+                          '%r: None if %s is None else float(%s)' % (name, value, value))
+        else:
+            check = 'type(%s) in _FLAG_TYPES and %r <= %s' % (value, low, value)
+            values.append('%r: %s' % (name, value))
+        if high is not None:
+            check += ' <= %r' % high
+        if not required:
+            check = '(%s is None or %s)' % (value, check)
+            optional.append('(%s is not None)' % value)
+        checks.append(check)
+    count = ' + '.join([str(len(specs) - len(optional))] + optional)
+    source = ['def validate(row, kind, index, errors):',
+              '    if type(row) is not dict:',
+              '        return explain(specs, cross_check, row, kind, index, errors)',
+              '    get = row.get']
+    source += ['    v%d = get(%r)' % (i, spec[0]) for i, spec in enumerate(specs)]
+    source += ['    if (%s and len(row) == %s):' % (' and '.join(checks), count),
+               '        return cross_check({%s}, kind, index, errors)' % ', '.join(values),
+               '    return explain(specs, cross_check, row, kind, index, errors)']
+    namespace = {'specs': specs, 'cross_check': cross_check, 'explain': _explain,
+                 '_NUMBER_TYPES': _NUMBER_TYPES, '_FLAG_TYPES': _FLAG_TYPES}
+    exec(compile('\n'.join(source), '<scorecard validator>', 'exec'), namespace)
+    return namespace['validate']
+
+
+# Function to convert cricket overs notation (4.3 = 4 overs 3 balls) into balls
+# Returns None if the part after the point is not a valid ball count
+def overs_to_balls(overs):
+    tenths = int(overs * 10 + 0.5)
+    whole = tenths // 10
+    balls = tenths - whole * 10
+    if balls > 5 or not -1e-6 < overs * 10 - tenths < 1e-6:
+        return None
+    return whole * 6 + balls
+
+
+# Function to cross-check the batting fields against each other
+def _check_batting(clean, kind, index, errors):
+    runs = clean['runs']
+    balls = clean['balls']
+    fours = clean['fours']
+    sixes = clean['sixes']
+    strike_rate = runs * 100.0 / balls if balls else 0.0
+    typed = clean['strike_rate']
+    valid = True
+    if fours * 4 + sixes * 6 > runs:
+        errors.append('%s[%d]: %d fours and %d sixes is more than %d runs' % (kind, index, fours, sixes, runs))
+        valid = False
+    if runs > 0 and balls == 0:
+        errors.append('%s[%d]: %d runs from no balls faced' % (kind, index, runs))
+        valid = False
+    if fours + sixes > balls:
+        errors.append('%s[%d]: %d boundaries from only %d balls' % (kind, index, fours + sixes, balls))
+        valid = False
+    if typed is not None and abs(typed - strike_rate) > RATE_TOLERANCE + RATE_RELATIVE_TOLERANCE * strike_rate:
+        errors.append('%s[%d].strike_rate: %r does not match runs/balls (%.2f)' % (kind, index, typed, strike_rate))
+        valid = False
+    if not valid:
+        return None
+    clean['strike_rate'] = int(strike_rate * 100 + 0.5) / 100.0
+    clean['not_out'] = 1 if clean['not_out'] else 0
+    return clean
+
+
+# Function to cross-check the bowling fields against each other
+def _check_bowling(clean, kind, index, errors):
+    balls = overs_to_balls(clean['overs'])
+    if balls is None:
+        errors.append('%s[%d].overs: %r is not valid overs notation (balls after the point must be 0-5)' % (kind, index, clean['overs']))
+        return None
+    runs = clean['runs_conceded']
+    typed = clean['economy_rate']
+    valid = True
+    if clean['maidens'] > balls // 6:
+        errors.append('%s[%d].maidens: %d maidens from only %d complete overs' % (kind, index, clean['maidens'], balls // 6))
+        valid = False
+    if clean['wickets'] > balls:
+        errors.append('%s[%d].wickets: %d wickets from only %d balls' % (kind, index, clean['wickets'], balls))
+        valid = False
+    # Runs can be conceded without a legal ball (wides), but there is no
+    # economy rate until one has been bowled, so it is stored as None
+    if not balls:
+        if typed is not None:
+            errors.append('%s[%d].economy_rate: no economy rate without a legal ball bowled' % (kind, index))
+            return None
+        return clean if valid else None
+    economy_rate = runs * 6.0 / balls
+    if typed is not None and abs(typed - economy_rate) > RATE_TOLERANCE + RATE_RELATIVE_TOLERANCE * economy_rate:
+        errors.append('%s[%d].economy_rate: %r does not match runs/overs (%.2f)' % (kind, index, typed, economy_rate))
+        valid = False
+    if not valid:
+        return None
+    clean['economy_rate'] = int(economy_rate * 100 + 0.5) / 100.0
+    return clean
+
+
+validate_batting_row = compile_validator(BATTING_FIELDS, _check_batting)
+validate_bowling_row = compile_validator(BOWLING_FIELDS, _check_bowling)
+
+
+# Function to turn a typed token into a number, leaving it as text if it
+# is not one so the validator reports it against the right field
+# Plain digits are checked first as they are by far the most common token
+def _number(token):
+    if token.isdecimal():
+        return int(token)
+    if _FLOAT_TOKEN(token):
+        return float(token)
+    try:
+        return int(token)
+    except ValueError:
+        return token
+
+
+# Function to split the compact line format into rows
+# Entries that cannot be read are recorded as errors and kept as _UNREADABLE
+# so later entries are still reported against the right position
+def _parse_lines(text, kind, errors):
+    batting = kind == 'batting'
+    names = _BATTING_TOKENS if batting else _BOWLING_TOKENS
+    rows = []
+    append = rows.append
+    for index, entry in enumerate(text.split(';')):
+        tokens = entry.split()
+        count = len(tokens)
+        if count != 5 and count != 6:
+            if count:
+                errors.append('%s[%d]: could not read %r' % (kind, index, entry.strip()))
+            append(_UNREADABLE)
+            continue
+        if batting:
+            runs = tokens[1]
+            not_out = runs[-1] == '*'
+            if not_out:
+                tokens[1] = runs[:-1]
+        else:
+            # Overs is usually written with a point (3.4) so it is read on its own
+            overs = tokens.pop(1)
+        # Almost every token is a whole number, so try them all with int()
+        # first and only fall back to _number when one is not
+        try:
+            row = dict(zip(names, map(int, tokens)))
+        except ValueError:
+            row = dict(zip(names, map(_number, tokens)))
+        if batting:
+            row['not_out'] = 1 if not_out else 0
+        else:
+            row['overs'] = _number(overs)
+        append(row)
+    return rows
+
+
+# Function used by json.loads to refuse NaN and Infinity
+def _reject_constant(name):
+    raise ValueError('%s is not a finite number' % name)
+
+
+# Function to read scorecard text as either JSON or the compact line format
+def load_rows(text, kind, errors):
+    text = text.strip()
+    if not text:
+        return []
+    if text[0] in '[{"':
+        try:
+            rows = json.loads(text, parse_constant=_reject_constant)
+        except RecursionError:
+            errors.append('%s: invalid JSON (nested too deeply)' % kind)
+            return []
+        except ValueError as e:
+            errors.append('%s: invalid JSON (%s)' % (kind, e))
+            return []
+    else:
+        # A single entry that does not fit the line format may still be a
+        # bare JSON value (5, null, true), which is reported as such
+        if ';' in text or len(text.split()) in (5, 6):
+            return _parse_lines(text, kind, errors)
+        try:
+            rows = json.loads(text, parse_constant=_reject_constant)
+        except (ValueError, RecursionError):
+            return _parse_lines(text, kind, errors)
+    if type(rows) is dict:
+        return [rows]
+    if type(rows) is not list:
+        errors.append('%s: expected a list of entries' % kind)
+        return []
+    return rows
+
+
+# Function to validate many rows at once (used by bulk imports)
+# Rows that are _UNREADABLE (already reported by _parse_lines) are skipped
+# Returns the cleaned rows and the list of every error found
+def validate_rows(rows, validator, kind, errors=None):
+    if errors is None:
+        errors = []
+    clean = []
+    append = clean.append
+    index = 0
+    for row in rows:
+        if row is not _UNREADABLE:
+            row = validator(row, kind, index, errors)
+            if row is not None:
+                append(row)
+        index += 1
+    return clean, errors
+
+
+# Function to parse batting stats from the dashboard
+# Raises ScorecardError listing every problem found
+def parse_batting_stats(text):
+    errors = []
+    rows = load_rows(text, 'batting', errors)
+    clean, errors = validate_rows(rows, validate_batting_row, 'batting', errors)
+    if errors:
+        raise ScorecardError(errors)
+    return clean
+
+
+# Function to parse bowling stats from the dashboard
+# Raises ScorecardError listing every problem found
+def parse_bowling_stats(text):
+    errors = []
+    rows = load_rows(text, 'bowling', errors)
+    clean, errors = validate_rows(rows, validate_bowling_row, 'bowling', errors)
+    if errors:
+        raise ScorecardError(errors)
+    return clean
+
+
+# Micro-benchmark for the bulk validators
+# Run with: python scorecard.py [rows]
+def benchmark(count=200000, repeat=3):
+    batting = []
+    bowling = []
+    for i in range(count):
+        fours, sixes = i % 7, i % 3
+        batting.append({'user_id': i % 11 + 1, 'runs': i % 50 + fours * 4 + sixes * 6, 'balls': i % 90 + 10,
+                        'fours': fours, 'sixes': sixes, 'not_out': i % 2 == 0})
+        bowling.append({'user_id': i % 11 + 1, 'overs': i % 10 + (i % 6) / 10.0 + 1, 'maidens': i % 2,
+                        'runs_conceded': i % 60, 'wickets': i % 5})
+    batting_text = '; '.join('%d %d%s %d %d %d' % (row['user_id'], row['runs'], '*' if row['not_out'] else '',
+                                                    row['balls'], row['fours'], row['sixes']) for row in batting)
+    bowling_text = '; '.join('%d %s %d %d %d' % (row['user_id'], row['overs'], row['maidens'],
+                                                  row['runs_conceded'], row['wickets']) for row in bowling)
+    runs = (('batting rows', lambda: validate_rows(batting, validate_batting_row, 'batting')[0]),
+            ('bowling rows', lambda: validate_rows(bowling, validate_bowling_row, 'bowling')[0]),
+            ('batting lines', lambda: parse_batting_stats(batting_text)),
+            ('bowling lines', lambda: parse_bowling_stats(bowling_text)))
+    # Each case is timed a few times and the best run kept, as timeit does
+    for name, run in runs:
+        elapsed = None
+        for attempt in range(repeat):
+            start = time.perf_counter()
+            clean = run()
+            taken = time.perf_counter() - start
+            if elapsed is None or taken < elapsed:
+                elapsed = taken
+        print('%-14s %8d rows  %6.3fs  %10.0f rows/s' % (name, len(clean), elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,171 @@
+#Tests for the scorecard parser and validator
+#Run with: python -m pytest test_scorecard.py (or python -m unittest test_scorecard)
+import unittest
+
+import scorecard
+from scorecard import ScorecardError, parse_batting_stats, parse_bowling_stats
+
+
+# Function to parse text and return the list of errors raised
+def errors_for(parse, text):
+    try:
+        parse(text)
+    except ScorecardError as e:
+        return e.errors
+    raise AssertionError('expected a ScorecardError for %r' % text)
+
+
+class BattingTests(unittest.TestCase):
+    def test_json_rows(self):
+        rows = parse_batting_stats('[{"user_id": 1, "runs": 45, "balls": 30, "fours": 4, "sixes": 2, "not_out": true},'
+                                   ' {"user_id": 2, "runs": 12, "balls": 15, "fours": 1, "sixes": 0, "strike_rate": 80}]')
+        self.assertEqual(rows, [
+            {'user_id': 1, 'runs': 45, 'balls': 30, 'fours': 4, 'sixes': 2, 'not_out': 1, 'strike_rate': 150.0},
+            {'user_id': 2, 'runs': 12, 'balls': 15, 'fours': 1, 'sixes': 0, 'not_out': 0, 'strike_rate': 80.0},
+        ])
+
+    def test_line_rows(self):
+        rows = parse_batting_stats('1 45* 30 4 2; 2 12 15 1 0 80')
+        self.assertEqual(rows, [
+            {'user_id': 1, 'runs': 45, 'balls': 30, 'fours': 4, 'sixes': 2, 'not_out': 1, 'strike_rate': 150.0},
+            {'user_id': 2, 'runs': 12, 'balls': 15, 'fours': 1, 'sixes': 0, 'not_out': 0, 'strike_rate': 80.0},
+        ])
+
+    def test_collects_every_error(self):
+        errors = errors_for(parse_batting_stats,
+                            '[{"user_id": 0, "runs": "a", "balls": 1.5, "fours": 1, "sixes": 0}, 5]')
+        self.assertEqual(errors, [
+            'batting[0].user_id: 0 is outside the range 1-9223372036854775807',
+            "batting[0].runs: expected a whole number, got 'a'",
+            'batting[0].balls: expected a whole number, got 1.5',
+            'batting[1]: expected an object with fields user_id, runs, balls, fours, sixes, not_out, strike_rate',
+        ])
+
+    def test_null_entry(self):
+        errors = errors_for(parse_batting_stats,
+                            '[{"user_id": 1, "runs": 4, "balls": 4, "fours": 1, "sixes": 0}, null]')
+        self.assertEqual(errors, ['batting[1]: expected an object with fields user_id, runs, balls, fours, sixes, not_out, strike_rate'])
+
+    def test_strike_rate_outside_tolerance(self):
+        self.assertEqual(parse_batting_stats('1 10 5 0 0 200.04')[0]['strike_rate'], 200.0)
+        self.assertEqual(parse_batting_stats('1 10 5 0 0 201')[0]['strike_rate'], 200.0)
+        self.assertEqual(errors_for(parse_batting_stats, '1 10 5 0 0 201.1'),
+                         ['batting[0].strike_rate: 201.1 does not match runs/balls (200.00)'])
+        self.assertEqual(errors_for(parse_batting_stats, '1 10 5 0 0 210'),
+                         ['batting[0].strike_rate: 210.0 does not match runs/balls (200.00)'])
+
+    def test_runs_without_balls(self):
+        self.assertEqual(errors_for(parse_batting_stats, '1 5 0 0 0'),
+                         ['batting[0]: 5 runs from no balls faced'])
+
+    def test_user_id_fits_sqlite_integer(self):
+        self.assertEqual(errors_for(parse_batting_stats, '99999999999999999999 4 4 1 0'),
+                         ['batting[0].user_id: 99999999999999999999 is outside the range 1-9223372036854775807'])
+        self.assertEqual(errors_for(parse_bowling_stats, '99999999999999999999 1 0 4 0'),
+                         ['bowling[0].user_id: 99999999999999999999 is outside the range 1-9223372036854775807'])
+
+    def test_unknown_field(self):
+        errors = errors_for(parse_batting_stats,
+                            '{"user_id": 1, "runs": 4, "balls": 4, "fours": 1, "sixes": 0, "extras": 2}')
+        self.assertEqual(errors, ['batting[0].extras: unknown field'])
+
+    def test_bool_and_float_in_int_fields(self):
+        rows = parse_batting_stats('{"user_id": 1.0, "runs": 10.0, "balls": 5, "fours": 1, "sixes": 1}')
+        self.assertEqual(rows[0]['runs'], 10)
+        self.assertIs(type(rows[0]['runs']), int)
+        errors = errors_for(parse_batting_stats, '{"user_id": 1, "runs": true, "balls": 5, "fours": 0, "sixes": 0}')
+        self.assertEqual(errors, ['batting[0].runs: expected a whole number, got True'])
+
+    def test_non_finite_numbers(self):
+        self.assertEqual(errors_for(parse_batting_stats, '{"user_id": 1, "runs": 1, "balls": 1, "fours": 0, "sixes": 0, "strike_rate": NaN}'),
+                         ['batting: invalid JSON (NaN is not a finite number)'])
+        errors = []
+        row = {'user_id': 1, 'runs': 1, 'balls': 1, 'fours': 0, 'sixes': 0, 'strike_rate': float('nan')}
+        self.assertIsNone(scorecard.validate_batting_row(row, 'batting', 0, errors))
+        self.assertEqual(errors, ['batting[0].strike_rate: expected a finite number, got nan'])
+
+    def test_deeply_nested_json(self):
+        self.assertEqual(errors_for(parse_batting_stats, '[' * 100000),
+                         ['batting: invalid JSON (nested too deeply)'])
+
+    def test_bare_json_value(self):
+        for text in ('"x"', '5', 'null'):
+            self.assertEqual(errors_for(parse_batting_stats, text), ['batting: expected a list of entries'])
+
+
+class BowlingTests(unittest.TestCase):
+    def test_json_rows(self):
+        rows = parse_bowling_stats('[{"user_id": 1, "overs": 4, "maidens": 0, "runs_conceded": 28, "wickets": 2}]')
+        self.assertEqual(rows, [
+            {'user_id': 1, 'overs': 4.0, 'maidens': 0, 'runs_conceded': 28, 'wickets': 2, 'economy_rate': 7.0},
+        ])
+
+    def test_line_rows(self):
+        rows = parse_bowling_stats('1 4 0 28 2; 2 3.4 1 19 1 5.18')
+        self.assertEqual(rows, [
+            {'user_id': 1, 'overs': 4.0, 'maidens': 0, 'runs_conceded': 28, 'wickets': 2, 'economy_rate': 7.0},
+            {'user_id': 2, 'overs': 3.4, 'maidens': 1, 'runs_conceded': 19, 'wickets': 1, 'economy_rate': 5.18},
+        ])
+
+    def test_bad_overs_notation(self):
+        self.assertEqual(errors_for(parse_bowling_stats, '1 3.6 0 20 1'),
+                         ['bowling[0].overs: 3.6 is not valid overs notation (balls after the point must be 0-5)'])
+
+    def test_economy_outside_tolerance(self):
+        self.assertEqual(errors_for(parse_bowling_stats, '1 2 0 10 2 9'),
+                         ['bowling[0].economy_rate: 9.0 does not match runs/overs (5.00)'])
+
+    def test_economy_has_no_upper_limit(self):
+        self.assertEqual(parse_bowling_stats('1 0.1 0 10 0 60')[0]['economy_rate'], 60.0)
+
+    def test_no_legal_balls(self):
+        self.assertEqual(parse_bowling_stats('1 0.0 0 5 0'),
+                         [{'user_id': 1, 'overs': 0.0, 'maidens': 0, 'runs_conceded': 5, 'wickets': 0, 'economy_rate': None}])
+        self.assertEqual(errors_for(parse_bowling_stats, '1 0 0 5 0 0'),
+                         ['bowling[0].economy_rate: no economy rate without a legal ball bowled'])
+
+    def test_nan_overs(self):
+        self.assertEqual(errors_for(parse_bowling_stats, '[{"user_id": 1, "overs": NaN, "maidens": 0, "runs_conceded": 1, "wickets": 0}]'),
+                         ['bowling: invalid JSON (NaN is not a finite number)'])
+        errors = []
+        row = {'user_id': 1, 'overs': float('nan'), 'maidens': 0, 'runs_conceded': 1, 'wickets': 0}
+        self.assertIsNone(scorecard.validate_bowling_row(row, 'bowling', 0, errors))
+        self.assertEqual(errors, ['bowling[0].overs: expected a finite number, got nan'])
+
+
+class FastSlowPathTests(unittest.TestCase):
+    # The compiled fast path and _explain must clean valid rows identically
+    def assert_paths_agree(self, fields, cross_check, validator, row):
+        fast_errors = []
+        slow_errors = []
+        # Swap out the slow path so a row that falls through to it fails the test
+        namespace = validator.__globals__
+        namespace['explain'] = None
+        try:
+            fast = validator(dict(row), 'row', 0, fast_errors)
+        finally:
+            namespace['explain'] = scorecard._explain
+        slow = scorecard._explain(fields, cross_check, dict(row), 'row', 0, slow_errors)
+        self.assertEqual(fast_errors, [])
+        self.assertEqual(slow_errors, [])
+        self.assertIsNotNone(fast)
+        self.assertEqual(fast, slow)
+        self.assertEqual([type(value) for value in fast.values()], [type(value) for value in slow.values()])
+
+    def test_batting(self):
+        for row in ({'user_id': 1, 'runs': 45, 'balls': 30, 'fours': 4, 'sixes': 2},
+                    {'user_id': 2, 'runs': 0, 'balls': 0, 'fours': 0, 'sixes': 0, 'not_out': True},
+                    {'user_id': 3, 'runs': 12, 'balls': 15, 'fours': 1, 'sixes': 0, 'not_out': 0, 'strike_rate': 80}):
+            self.assert_paths_agree(scorecard.BATTING_FIELDS, scorecard._check_batting,
+                                    scorecard.validate_batting_row, row)
+
+    def test_bowling(self):
+        for row in ({'user_id': 1, 'overs': 4, 'maidens': 0, 'runs_conceded': 28, 'wickets': 2},
+                    {'user_id': 2, 'overs': 3.4, 'maidens': 1, 'runs_conceded': 19, 'wickets': 1, 'economy_rate': 5.18},
+                    {'user_id': 3, 'overs': 0.0, 'maidens': 0, 'runs_conceded': 0, 'wickets': 0}):
+            self.assert_paths_agree(scorecard.BOWLING_FIELDS, scorecard._check_bowling,
+                                    scorecard.validate_bowling_row, row)
+
+
+if __name__ == '__main__':
+    unittest.main()